@@ -3,16 +3,21 @@
 
 import random
 
+# Doubled values for 1..99, precomputed at import so main() only indexes.
+_DOUBLED = tuple(i * 2 for i in range(1, 100))
+
 def main():
-    number = random.randint(1, 99)
+    idx = random.randrange(99)
+    number = idx + 1
+    doubled = _DOUBLED[idx]
     print(f"What is {number} doubled?")
     user_input = input()
     try:
         answer = int(user_input)
-        if answer == number * 2:
+        if answer == doubled:
             print("Correct!")
         else:
-            print(f"Wrong! The answer was {number * 2}")
+            print(f"Wrong! The answer was {doubled}")
     except ValueError:
         print("That isn't a number")
 
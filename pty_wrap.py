@@ -11,6 +11,9 @@ Subcommands:
 """
 
 import argparse
+import errno
+import fcntl
+import mmap
 import os
 import pty
 import select
@@ -19,12 +22,99 @@ import signal
 import sys
 import tempfile
 import time
-import uuid
+from dataclasses import dataclass, field
 
 SESSIONS_DIR = os.path.join(tempfile.gettempdir(), "pty-wrap-sessions")
 
+# splice(2) is Linux-only; elsewhere output is copied through userspace.
+_HAS_SPLICE = hasattr(os, "splice")
+
+# Per-transfer chunk size. 64 KiB amortizes per-syscall overhead much
+# better than page-sized reads; pipe-style buffers stop gaining past this.
+CHUNK = 65536
+
+# Target capacity for the splice staging pipe (capped by the kernel's
+# /proc/sys/fs/pipe-max-size).
+PIPE_CAPACITY = 1 << 20
+
+
+@dataclass
+class _Session:
+    """Bridge state that lives for the whole wrapped-process lifetime.
+
+    The staging pipe is allocated once here rather than per transfer, so
+    its kernel pages stay hot instead of being re-allocated on every
+    chunk. The input FIFO is itself a pipe, so the FIFO-to-master
+    direction needs no staging.
+    """
+
+    pid: int
+    master_fd: int
+    in_fd: int
+    out_fd: int
+    pipe_r: int = -1
+    pipe_w: int = -1
+    use_splice: bool = _HAS_SPLICE
+    # Scatter buffers reused for every FIFO read (see _forward_input).
+    in_bufs: list = field(
+        default_factory=lambda: [bytearray(CHUNK), bytearray(CHUNK)]
+    )
+    # Fixed buffer reused for every non-splice master read.
+    read_buf: bytearray = field(default_factory=lambda: bytearray(CHUNK))
+
+    def close(self):
+        for fd in (self.out_fd, self.pipe_r, self.pipe_w, self.in_fd, self.master_fd):
+            if fd >= 0:
+                os.close(fd)
+
+
+def _new_pipe(capacity):
+    """Create a pipe and try to grow it to the requested capacity."""
+    pipe_r, pipe_w = os.pipe()
+    try:
+        fcntl.fcntl(pipe_w, fcntl.F_SETPIPE_SZ, capacity)
+    except OSError:
+        pass  # default size still works
+    return pipe_r, pipe_w
+
+
+def _install_sigchld_wake():
+    """Make SIGCHLD delivery visible as a readable fd.
+
+    Lets the bridge loops block with no timeout instead of polling
+    waitpid every 100 ms: an idle wrapped program costs zero wakeups and
+    child exit is noticed at signal-delivery latency. The wake byte is
+    written by the interpreter's C-level signal handler via
+    set_wakeup_fd, so the fd becomes readable immediately on delivery
+    rather than after a Python-level handler gets to run between
+    bytecodes. Returns the readable wake fd.
+    """
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w, warn_on_full_buffer=False)
+    # A Python-level handler must exist for the signal to be routed to
+    # the wakeup fd at all; it deliberately does nothing itself.
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    return wake_r
+
+
+def _drain_wake_fd(wake_fd):
+    """Consume pending wakeups so the fd can signal again."""
+    try:
+        while os.read(wake_fd, 8):
+            pass
+    except OSError:
+        pass
+
 
 def main():
+    # Internal re-exec entry point used by cmd_start (see _daemon_main),
+    # kept out of argparse so it doesn't show up in --help.
+    if len(sys.argv) > 1 and sys.argv[1] == "_daemon":
+        _daemon_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         prog="pty-wrap",
         description="Run interactive programs with simple command-based I/O.",
@@ -104,41 +194,74 @@ def cmd_start(args):
         sys.exit("Error: No command specified")
     
     # Create session
-    session_id = uuid.uuid4().hex[:8]
+    session_id = os.urandom(4).hex()
     session_dir = get_session_dir(session_id)
     os.makedirs(session_dir, exist_ok=True)
     
-    output_file = os.path.join(session_dir, "output.txt")
     input_fifo = os.path.join(session_dir, "input.fifo")
-    pid_file = os.path.join(session_dir, "pid")
     cmd_file = os.path.join(session_dir, "cmd")
-    
+
     # Save command for reference
     with open(cmd_file, "w") as f:
         f.write(" ".join(program))
-    
+
     # Create FIFO
     os.mkfifo(input_fifo)
     
-    # Fork the wrapper process (double-fork to daemonize)
-    pid = os.fork()
-    if pid > 0:
-        # Parent: wait for intermediate child to exit, then print session ID
-        os.waitpid(pid, 0)  # Reap the intermediate child (exits immediately)
-        print(f"session: {session_id}")
-        return
-    
-    # First child: fork again to daemonize
+    # Readiness pipe: the daemon writes one byte once the pid file exists
+    # and the FIFO is open, so the parent returns exactly when the session
+    # is usable instead of racing the daemon's setup.
+    ready_r, ready_w = os.pipe()
+    os.set_inheritable(ready_w, True)
+
+    # Spawn the detached session daemon in one step instead of the classic
+    # double fork: no COW copy of the interpreter heap and no intermediate
+    # child to reap. The daemon calls setsid() itself on startup.
+    os.posix_spawn(
+        sys.executable,
+        [sys.executable, os.path.abspath(__file__), "_daemon",
+         session_dir, str(ready_w)] + program,
+        os.environ,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_DUP2, 1, 2),
+        ],
+    )
+
+    os.close(ready_w)
+    ready = os.read(ready_r, 1)
+    os.close(ready_r)
+    if not ready:
+        sys.exit("Error: Session daemon failed to start")
+    print(f"session: {session_id}")
+
+
+def _daemon_main(argv):
+    """Entry point for the detached session daemon spawned by cmd_start.
+
+    argv is [session_dir, ready_fd, program...].
+    """
+    session_dir = argv[0]
+    ready_fd = int(argv[1])
+    program = argv[2:]
+
+    # The fd was made inheritable to survive our own exec; restore
+    # close-on-exec so it doesn't leak into the wrapped program, where it
+    # would keep cmd_start's readiness read blocked if we die during setup.
+    os.set_inheritable(ready_fd, False)
+
     os.setsid()
-    pid2 = os.fork()
-    if pid2 > 0:
-        os._exit(0)
-    
-    # Daemon process: run the wrapper
-    with open(pid_file, "w") as f:
+
+    with open(os.path.join(session_dir, "pid"), "w") as f:
         f.write(str(os.getpid()))
-    
-    run_wrapper(output_file, input_fifo, program)
+
+    run_wrapper(
+        os.path.join(session_dir, "output.txt"),
+        os.path.join(session_dir, "input.fifo"),
+        program,
+        ready_fd=ready_fd,
+    )
     # Don't auto-cleanup - let user call 'pty-wrap stop' to read final output first
 
 
@@ -149,9 +272,8 @@ def cmd_read(args):
     
     if not os.path.exists(output_file):
         sys.exit(f"Error: Session '{args.session}' not found")
-    
-    with open(output_file) as f:
-        print(f.read(), end="")
+
+    _cat_file(output_file)
     
     # Auto-cleanup if process has exited (unless --keep)
     if not args.keep:
@@ -164,6 +286,55 @@ def cmd_read(args):
             shutil.rmtree(session_dir, ignore_errors=True)
 
 
+def _cat_file(path):
+    """Copy a file to stdout, in-kernel via sendfile where possible.
+
+    sendfile avoids materializing the whole transcript as a Python
+    string; when stdout is not a sendfile target (some platforms only
+    accept sockets), large files are memory-mapped and written out
+    pagewise, and small ones fall back to a chunked read/write copy.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        sys.stdout.flush()
+        out = sys.stdout.fileno()
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(out, fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            pass
+
+        if size - offset > CHUNK:
+            # Fault the file in pagewise rather than copying it chunk by
+            # chunk through a userspace buffer.
+            mm = mmap.mmap(fd, size, prot=mmap.PROT_READ)
+            try:
+                view = memoryview(mm)
+                try:
+                    while offset < size:
+                        offset += os.write(out, view[offset:])
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+            return
+
+        os.lseek(fd, offset, os.SEEK_SET)
+        while True:
+            data = os.read(fd, CHUNK)
+            if not data:
+                break
+            os.write(out, data)
+    finally:
+        os.close(fd)
+
+
 def cmd_send(args):
     session_dir = get_session_dir(args.session)
     pid_file = os.path.join(session_dir, "pid")
@@ -180,35 +351,40 @@ def cmd_send(args):
     except (FileNotFoundError, ProcessLookupError, ValueError):
         sys.exit(f"Error: Session '{args.session}' is not running")
     
-    # Write to FIFO with timeout (fork to avoid blocking main process)
     input_data = args.input + "\n"
-    
-    child_pid = os.fork()
-    if child_pid == 0:
-        # Child: write to FIFO
-        try:
-            fd = os.open(input_fifo, os.O_WRONLY)
-            os.write(fd, input_data.encode())
-            os.close(fd)
-            os._exit(0)
-        except Exception:
-            os._exit(1)
-    else:
-        # Parent: wait with timeout
-        for _ in range(50):  # 5 second timeout
-            result = os.waitpid(child_pid, os.WNOHANG)
-            if result[0] != 0:
-                if result[1] == 0:
-                    print("ok")
-                    return
-                else:
-                    sys.exit("Error: Failed to send input")
-            time.sleep(0.1)
-        
-        # Timeout - kill child and report error
-        os.kill(child_pid, signal.SIGKILL)
-        os.waitpid(child_pid, 0)
-        sys.exit("Error: Timeout sending input (process may have exited)")
+
+    # A plain O_WRONLY open of a FIFO blocks until a reader appears, which
+    # is why sends used to be forked off under a timeout. With O_NONBLOCK
+    # the open instead fails with ENXIO when no reader is attached, and
+    # the daemon holds the FIFO's read end for the whole session, so ENXIO
+    # simply means the session is gone.
+    try:
+        fd = os.open(input_fifo, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError as e:
+        if e.errno == errno.ENXIO:
+            sys.exit(f"Error: Session '{args.session}' is not accepting input")
+        raise
+
+    # Keep the fd non-blocking and bound the write with a deadline: the
+    # daemon can be alive yet not draining the FIFO (e.g. stalled against
+    # a wrapped program that has stopped reading the PTY), and send must
+    # not hang forever in that case.
+    data = memoryview(input_data.encode())
+    deadline = time.monotonic() + 5.0
+    try:
+        while data:
+            try:
+                data = data[os.write(fd, data):]
+            except BrokenPipeError:
+                sys.exit(f"Error: Session '{args.session}' is not accepting input")
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([], [fd], [], remaining)[1]:
+                    sys.exit("Error: Timeout sending input (process may have exited)")
+    finally:
+        os.close(fd)
+
+    print("ok")
 
 
 def cmd_status(args):
@@ -253,39 +429,52 @@ def cmd_stop(args):
     print("stopped")
 
 
+def _read_small(path, limit=4096):
+    """Read a small file with raw syscalls, skipping TextIOWrapper setup."""
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, limit)
+    finally:
+        os.close(fd)
+
+
 def cmd_list(args):
-    if not os.path.exists(SESSIONS_DIR):
+    try:
+        it = os.scandir(SESSIONS_DIR)
+    except FileNotFoundError:
         return
-    
-    for session_id in os.listdir(SESSIONS_DIR):
-        session_dir = get_session_dir(session_id)
-        pid_file = os.path.join(session_dir, "pid")
-        cmd_file = os.path.join(session_dir, "cmd")
-        
-        status = "exited"
-        try:
-            with open(pid_file) as f:
-                pid = int(f.read().strip())
-            os.kill(pid, 0)
-            status = "running"
-        except (FileNotFoundError, ProcessLookupError, ValueError):
-            pass
-        
-        cmd = ""
-        try:
-            with open(cmd_file) as f:
-                cmd = f.read().strip()
-        except FileNotFoundError:
-            pass
-        
-        print(f"{session_id}  {status:8}  {cmd}")
 
+    with it:
+        for entry in it:
+            status = "exited"
+            try:
+                pid = int(_read_small(entry.path + "/pid", 32))
+                os.kill(pid, 0)
+                status = "running"
+            except (FileNotFoundError, ProcessLookupError, ValueError):
+                pass
 
-def run_wrapper(output_file: str, input_fifo: str, command: list[str]):
-    """Run a command in a PTY with file-based I/O."""
+            cmd = ""
+            try:
+                cmd = _read_small(entry.path + "/cmd").decode().strip()
+            except FileNotFoundError:
+                pass
+
+            print(f"{entry.name}  {status:8}  {cmd}")
+
+
+def run_wrapper(output_file: str, input_fifo: str, command: list[str], ready_fd=None):
+    """Run a command in a PTY with file-based I/O.
+
+    If ready_fd is given, one byte is written to it (and it is closed)
+    once the session is ready to accept input.
+    """
     
     master_fd, slave_fd = pty.openpty()
-    
+
+    # Install before forking so an early child exit cannot be missed.
+    wake_fd = _install_sigchld_wake()
+
     pid = os.fork()
     
     if pid == 0:
@@ -302,66 +491,223 @@ def run_wrapper(output_file: str, input_fifo: str, command: list[str]):
     else:
         # Parent: bridge PTY and files
         os.close(slave_fd)
-        
-        out_f = open(output_file, "a")
+        os.set_blocking(master_fd, False)
+
         in_fd = os.open(input_fifo, os.O_RDONLY | os.O_NONBLOCK)
-        
+
+        # Create the log before signaling readiness: cmd_read treats a
+        # missing output.txt as "session not found", so the file must
+        # exist by the time start returns. The bridges reopen it O_CREAT
+        # for writing either way.
+        os.close(os.open(output_file, os.O_WRONLY | os.O_CREAT, 0o644))
+
+        if ready_fd is not None:
+            os.write(ready_fd, b"x")
+            os.close(ready_fd)
+
+        if _HAS_SPLICE:
+            _bridge_linux(master_fd, in_fd, output_file, pid, wake_fd)
+        else:
+            _bridge_select(master_fd, in_fd, output_file, pid, wake_fd)
+
+
+def _bridge_linux(master_fd, in_fd, output_file, pid, wake_fd):
+    """Bridge loop for Linux: epoll-driven, splicing PTY output straight
+    into the log file.
+
+    Nothing inspects the bytes between the PTY and the file, so they can
+    move kernel-side through a staging pipe (splice requires one end to be
+    a pipe) without ever being copied into Python. Edge-triggered epoll
+    pairs with the drain-until-EAGAIN copy helpers and delivers the PTY
+    hangup as an ordinary event.
+    """
+    # No O_APPEND: splice() to an append-mode file fails with EINVAL, and
+    # we are the only writer so the file offset is enough.
+    sess = _Session(
+        pid=pid,
+        master_fd=master_fd,
+        in_fd=in_fd,
+        out_fd=os.open(output_file, os.O_WRONLY | os.O_CREAT, 0o644),
+    )
+    sess.pipe_r, sess.pipe_w = _new_pipe(PIPE_CAPACITY)
+
+    ep = select.epoll()
+    ep.register(master_fd, select.EPOLLIN | select.EPOLLET | select.EPOLLRDHUP)
+    ep.register(in_fd, select.EPOLLIN | select.EPOLLET)
+    ep.register(wake_fd, select.EPOLLIN)
+
+    # Bind the hot names once; the loop body runs per I/O event and the
+    # repeated global/attribute lookups are measurable on chatty output.
+    poll = ep.poll
+    copy_master = _copy_master_raw
+    forward_input = _forward_input
+    waitpid = os.waitpid
+    wnohang = os.WNOHANG
+    hup_mask = select.EPOLLHUP | select.EPOLLRDHUP
+
+    try:
+        while True:
+            for fd, events in poll(-1):
+                if fd == master_fd:
+                    copy_master(sess)
+                    if events & hup_mask:
+                        _drain_pty_raw(sess)
+                        raise EOFError
+
+                elif fd == in_fd:
+                    forward_input(sess)
+
+                elif fd == wake_fd:
+                    _drain_wake_fd(wake_fd)
+                    if waitpid(pid, wnohang)[0] != 0:
+                        _drain_pty_raw(sess)
+                        raise EOFError
+
+    except EOFError:
+        pass
+
+    finally:
+        ep.close()
+        os.write(sess.out_fd, b"\n[pty-wrap: process exited]\n")
+        sess.close()
+
+
+def _copy_master_raw(sess):
+    """Drain buffered PTY output into the log fd, splicing when possible.
+
+    Raises EOFError when the PTY is closed. Downgrades sess.use_splice on
+    kernels that cannot splice from a tty.
+    """
+    if sess.use_splice:
+        splice = os.splice
+        in_flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+        out_flags = os.SPLICE_F_MOVE | os.SPLICE_F_MORE
+    while True:
+        if sess.use_splice:
+            try:
+                n = splice(sess.master_fd, sess.pipe_w, CHUNK, flags=in_flags)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno in (errno.EINVAL, errno.ENOSYS):
+                    sess.use_splice = False
+                    continue
+                raise EOFError
+            if n == 0:
+                raise EOFError
+            left = n
+            while left > 0:
+                left -= splice(sess.pipe_r, sess.out_fd, left, flags=out_flags)
+        else:
+            try:
+                n = os.readv(sess.master_fd, [sess.read_buf])
+            except BlockingIOError:
+                return
+            except OSError:
+                raise EOFError
+            if n <= 0:
+                raise EOFError
+            os.write(sess.out_fd, memoryview(sess.read_buf)[:n])
+
+
+def _drain_pty_raw(sess):
+    """Read remaining output from PTY into the log fd."""
+    while True:
+        ready, _, _ = select.select([sess.master_fd], [], [], 0.1)
+        if not ready:
+            break
         try:
-            while True:
-                ready, _, _ = select.select([master_fd, in_fd], [], [], 0.1)
-                
-                for fd in ready:
-                    if fd == master_fd:
-                        try:
-                            data = os.read(master_fd, 4096)
-                            if data:
-                                out_f.write(data.decode("utf-8", errors="replace"))
-                                out_f.flush()
-                            else:
-                                raise EOFError
-                        except OSError:
-                            raise EOFError
-                    
-                    elif fd == in_fd:
-                        try:
-                            data = os.read(in_fd, 4096)
-                            if data:
-                                os.write(master_fd, data)
-                        except OSError:
-                            pass
-                
-                # Check if child exited
-                result = os.waitpid(pid, os.WNOHANG)
-                if result[0] != 0:
-                    drain_pty(master_fd, out_f)
-                    break
-        
+            _copy_master_raw(sess)
         except EOFError:
-            pass
-        
-        finally:
-            out_f.write("\n[pty-wrap: process exited]\n")
-            out_f.close()
-            os.close(in_fd)
-            os.close(master_fd)
+            break
 
 
-def drain_pty(master_fd, out_f):
-    """Read remaining output from PTY."""
+def _forward_input(sess):
+    """Drain buffered FIFO input into the PTY master.
+
+    Reads scatter into two preallocated buffers via readv, so a burst of
+    queued input moves in one syscall with no per-chunk bytes allocation,
+    and is forwarded with writev.
+    """
     while True:
-        ready, _, _ = select.select([master_fd], [], [], 0.1)
-        if not ready:
+        try:
+            n = os.readv(sess.in_fd, sess.in_bufs)
+        except OSError:
             break
+        if n <= 0:
+            break
+        if n <= CHUNK:
+            views = [memoryview(sess.in_bufs[0])[:n]]
+        else:
+            views = [memoryview(sess.in_bufs[0]),
+                     memoryview(sess.in_bufs[1])[:n - CHUNK]]
         try:
-            data = os.read(master_fd, 4096)
-            if data:
-                out_f.write(data.decode("utf-8", errors="replace"))
-                out_f.flush()
-            else:
-                break
+            _writev_all(sess.master_fd, views)
         except OSError:
             break
 
 
+def _writev_all(fd, views):
+    """Write all views to a possibly non-blocking fd."""
+    while views:
+        try:
+            n = os.writev(fd, views)
+        except BlockingIOError:
+            select.select([], [fd], [])
+            continue
+        while n > 0 and views:
+            if n >= len(views[0]):
+                n -= len(views[0])
+                views.pop(0)
+            else:
+                views[0] = views[0][n:]
+                n = 0
+
+
+def _bridge_select(master_fd, in_fd, output_file, pid, wake_fd):
+    """Portable bridge loop: select-driven, copying output through userspace."""
+    sess = _Session(
+        pid=pid,
+        master_fd=master_fd,
+        in_fd=in_fd,
+        out_fd=os.open(
+            output_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644
+        ),
+        use_splice=False,
+    )
+
+    # Same hot-name binding as the Linux bridge (see _bridge_linux).
+    do_select = select.select
+    copy_master = _copy_master_raw
+    forward_input = _forward_input
+    waitpid = os.waitpid
+    wnohang = os.WNOHANG
+    fds = [master_fd, in_fd, wake_fd]
+
+    try:
+        while True:
+            ready, _, _ = do_select(fds, [], [])
+
+            for fd in ready:
+                if fd == master_fd:
+                    copy_master(sess)
+
+                elif fd == in_fd:
+                    forward_input(sess)
+
+                elif fd == wake_fd:
+                    _drain_wake_fd(wake_fd)
+                    if waitpid(pid, wnohang)[0] != 0:
+                        _drain_pty_raw(sess)
+                        raise EOFError
+
+    except EOFError:
+        pass
+
+    finally:
+        os.write(sess.out_fd, b"\n[pty-wrap: process exited]\n")
+        sess.close()
+
+
 if __name__ == "__main__":
     main()